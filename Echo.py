@@ -1,15 +1,25 @@
 # Echo.py
 
+import asyncio
 import logging
 import os
-from typing import Union, List, Dict
-from datetime import datetime, time, timedelta
+import re
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import lru_cache
+from time import monotonic
+from typing import Union, List, Dict, Tuple
+from datetime import date, datetime, time, timedelta
 
 # New Imports for Time Zone Handling
 from zoneinfo import ZoneInfo
 
 # Imports for PostgreSQL Database
 import psycopg2
+from psycopg2.extras import NamedTupleCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
@@ -47,163 +57,369 @@ ENTRY_POINT, GETTING_NAME, GETTING_AGE, GETTING_PHONE_NEW, GETTING_PHONE_REGULAR
 
 # --- KEYBOARDS ---
 start_over_keyboard = ReplyKeyboardMarkup([["Start Over 🚀"]], resize_keyboard=True)
+entry_options_markup = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("I'm a First-time User", callback_data="new_user"),
+        InlineKeyboardButton("I'm a Regular User", callback_data="regular_user"),
+    ],
+    [InlineKeyboardButton("Stop ⛔", callback_data="cancel_flow")]
+])
+confirm_profile_markup = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("Yes, continue with this account", callback_data="continue_yes"),
+        InlineKeyboardButton("No, use a different number", callback_data="continue_no"),
+    ]
+])
+finish_session_markup = InlineKeyboardMarkup(
+    [[InlineKeyboardButton("Finish Session ✅", callback_data="end_session")]]
+)
+post_booking_markup = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Book Another Appointment", callback_data="start_over_inline")],
+    [InlineKeyboardButton("Finish Session ✅", callback_data="end_session")]
+])
+
+# --- CALLBACK ROUTING PATTERNS ---
+# PTB matches callback_data with re.match, so an anchored prefix is enough;
+# the old trailing ".*$" only added pointless scanning per button press.
+CONTINUE_RE = re.compile(r"^continue_")
+SPECIALTY_RE = re.compile(r"^specialty:")
+SLOT_ROUTER_RE = re.compile(r"^(doctor|next_day):")
+BOOK_RE = re.compile(r"^book:")
+SHOW_TODAY_RE = re.compile(r"^show_today:")
+
+# --- HANDLER FILTERS ---
+# Composed once; every MessageHandler line reuses the same filter objects.
+TEXT_INPUT_FILTER = filters.TEXT & ~filters.COMMAND
+START_OVER_FILTER = filters.Regex("^Start Over 🚀$")
 
 
 # --- DATABASE HELPER FUNCTIONS ---
 
-def get_db_connection():
-    """Establishes and returns a database connection."""
+# Opening a fresh connection per query costs a full TCP+auth handshake;
+# a small pool keeps connections alive across handler calls instead.
+_POOL: Union[ThreadedConnectionPool, None] = None
+# Helpers run on db_call worker threads, so first use can race: without the
+# lock two threads could each build a pool and leak the loser's connections.
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> Union[ThreadedConnectionPool, None]:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                try:
+                    # minconn == maxconn: putconn closes any connection
+                    # beyond minconn, so a smaller floor would shed the
+                    # burst connections (and their prepared plans) right
+                    # after each spike, re-paying the handshake next time.
+                    _POOL = ThreadedConnectionPool(20, 20, DATABASE_URL)
+                except psycopg2.OperationalError as e:
+                    logger.error(f"CRITICAL: Could not connect to the database: {e}")
+    return _POOL
+
+
+# Server-side prepared plans for the hottest queries. Prepared once per
+# pooled connection (session state survives putconn/getconn), so Postgres
+# skips re-parsing and re-planning the SQL text on every execution.
+_PREPARE_STATEMENTS = """
+    PREPARE echo_find_profile (text) AS
+        SELECT PatientName, Age FROM profiles WHERE PhoneNumber = $1;
+    PREPARE echo_available_slots (timestamptz, timestamptz, int, int, timestamptz) AS
+        SELECT s.slot
+        FROM generate_series($1, $2 - $3 * interval '1 minute',
+                             $3 * interval '1 minute') s(slot)
+        LEFT JOIN appointments a
+               ON a.DoctorID = $4 AND a.AppointmentDateTime = s.slot
+        WHERE a.AppointmentDateTime IS NULL
+          AND ($5 IS NULL OR s.slot > $5)
+        ORDER BY s.slot;
+"""
+
+
+# psycopg2's C connection type has no instance __dict__, so prepared
+# connections can't be flagged with an attribute; track them in a weak
+# registry instead. Entries disappear when the pool closes a connection,
+# and each connection is only ever held by one thread at a time.
+_PREPARED_CONNS = weakref.WeakSet()
+
+
+def _ensure_prepared(conn) -> None:
+    if conn in _PREPARED_CONNS:
+        return
+    with conn.cursor() as cur:
+        cur.execute(_PREPARE_STATEMENTS)
+    _PREPARED_CONNS.add(conn)
+
+
+@contextmanager
+def get_conn():
+    """Checks a connection out of the pool and always returns it when done.
+
+    Yields None if the pool itself is unavailable. Connections that raised
+    are discarded (close=True) instead of being put back in the pool.
+    """
+    pool = _get_pool()
+    if not pool:
+        yield None
+        return
+    try:
+        conn = pool.getconn()
+    except psycopg2.pool.PoolError as e:
+        # Every connection is checked out; degrade like an unavailable
+        # pool (helpers return None/[]) instead of crashing the handler.
+        logger.error(f"Connection pool exhausted: {e}")
+        yield None
+        return
+    broken = False
     try:
-        return psycopg2.connect(DATABASE_URL)
-    except psycopg2.OperationalError as e:
-        logger.error(f"CRITICAL: Could not connect to the database: {e}")
-        return None
+        _ensure_prepared(conn)
+        yield conn
+    except Exception:
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+# Specialties and doctors change rarely, so re-querying them for every user
+# flow is wasted round-trips. The whole catalog (specialty -> doctor rows)
+# is prefetched in one query and kept in-process for a few minutes.
+_CACHE_TTL = 300  # seconds
+_CATALOG: Union[Dict[str, List], None] = None
+_CATALOG_BY_ID: Dict[int, tuple] = {}
+_CATALOG_TS = 0.0
+# The specialty keyboard only changes when the catalog does, so it is built
+# once per catalog refresh instead of per show_specialties call.
+_SPECIALTY_MARKUP: Union[InlineKeyboardMarkup, None] = None
+# Handlers run in worker threads via db_call, so an expired TTL could send
+# several of them refreshing the catalog at once without this lock.
+_CATALOG_LOCK = threading.Lock()
+
+# Lightweight result records - each feeds a single call site, so a plain
+# namedtuple beats allocating a throwaway dict per call.
+Profile = namedtuple("Profile", "name age")
+Booking = namedtuple("Booking", "time inserted")
+
+# Returning users look up the same phone number on every login; remember the
+# result (including misses) for a while. save_new_profile keeps it in sync.
+# Bounded as an LRU - misses are keyed by whatever users type, so an
+# unbounded dict would grow with every typo for the life of the process.
+# The lock keeps the multi-step bump/evict sequences safe across the
+# db_call worker threads that read and write this cache.
+_PROFILE_CACHE_MAX = 256
+_profile_cache: "OrderedDict[str, Tuple[float, Union[Profile, None]]]" = OrderedDict()
+_PROFILE_CACHE_LOCK = threading.Lock()
+
+
+def _cache_profile(phone: str, profile: Union[Profile, None]) -> None:
+    with _PROFILE_CACHE_LOCK:
+        _profile_cache[phone] = (monotonic(), profile)
+        _profile_cache.move_to_end(phone)
+        if len(_profile_cache) > _PROFILE_CACHE_MAX:
+            _profile_cache.popitem(last=False)
+
+
+def _load_catalog() -> Dict[str, List]:
+    """Returns {specialty: [doctor rows]} - one query, TTL-refreshed."""
+    global _CATALOG, _CATALOG_BY_ID, _CATALOG_TS, _SPECIALTY_MARKUP
+    if _CATALOG is not None and monotonic() - _CATALOG_TS < _CACHE_TTL:
+        return _CATALOG
+    with _CATALOG_LOCK:
+        # Another thread may have refreshed while we waited for the lock.
+        if _CATALOG is not None and monotonic() - _CATALOG_TS < _CACHE_TTL:
+            return _CATALOG
+        with get_conn() as conn:
+            if not conn: return _CATALOG or {}
+            with conn.cursor(cursor_factory=NamedTupleCursor) as cur:
+                cur.execute("""
+                    SELECT s.name AS specialty, d.DoctorID AS doctor_id,
+                           d.DoctorName AS doctor_name, d.Experience AS experience
+                    FROM doctors d
+                    JOIN specialties s ON d.SpecialtyID = s.id
+                    ORDER BY s.name, d.Experience DESC;
+                """)
+                catalog: Dict[str, List] = {}
+                for row in cur.fetchall():
+                    catalog.setdefault(row.specialty, []).append(row)
+        _SPECIALTY_MARKUP = InlineKeyboardMarkup(
+            [[InlineKeyboardButton(s, callback_data=f"specialty:{s}")] for s in catalog]
+            + [[InlineKeyboardButton("Stop ⛔", callback_data="cancel_flow")]]
+        ) if catalog else None
+        _CATALOG = catalog
+        _CATALOG_BY_ID = {row.doctor_id: row for rows in catalog.values() for row in rows}
+        _CATALOG_TS = monotonic()
+    return catalog
+
+
+def get_specialty_markup() -> Union[InlineKeyboardMarkup, None]:
+    """Returns the cached specialty keyboard, or None if the catalog is empty."""
+    _load_catalog()
+    return _SPECIALTY_MARKUP
 
 
 def get_specialties_from_db() -> List[str]:
-    conn = get_db_connection()
-    if not conn: return []
-    with conn.cursor() as cur:
-        cur.execute("SELECT name FROM specialties ORDER BY name;")
-        specialties = [row[0] for row in cur.fetchall()]
-    conn.close()
-    return specialties
+    return list(_load_catalog().keys())
 
 
-def get_doctors_by_specialty(selected_specialty: str) -> List[Dict]:
-    conn = get_db_connection()
-    if not conn: return []
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT d.DoctorID, d.DoctorName, d.Experience FROM doctors d
-            JOIN specialties s ON d.SpecialtyID = s.id
-            WHERE s.name = %s ORDER BY d.Experience DESC;
-        """, (selected_specialty,))
-        doctors = [{'DoctorID': r[0], 'DoctorName': r[1], 'Experience': r[2]} for r in cur.fetchall()]
-    conn.close()
-    return doctors
-
-
-def get_doctor_by_id(doctor_id_to_find: str) -> Union[Dict, None]:
-    conn = get_db_connection()
-    if not conn: return None
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT d.DoctorName, s.name as Specialty FROM doctors d
-            JOIN specialties s ON d.SpecialtyID = s.id
-            WHERE d.DoctorID = %s;
-        """, (int(doctor_id_to_find),))
-        result = cur.fetchone()
-    conn.close()
-    return {'DoctorName': result[0], 'Specialty': result[1]} if result else None
-
-
-def generate_time_slots(day: datetime, start_hour=9, end_hour=18, interval_minutes=15) -> List[datetime]:
-    start_time = datetime.combine(day.date(), time(start_hour, 0), tzinfo=LOCAL_TZ)
-    end_time = datetime.combine(day.date(), time(end_hour, 0), tzinfo=LOCAL_TZ)
-    slots = []
-    current_time = start_time
-    while current_time < end_time:
-        slots.append(current_time)
-        current_time += timedelta(minutes=interval_minutes)
-    return slots
+def get_doctors_by_specialty(selected_specialty: str) -> List:
+    """Returns doctor rows as named tuples (doctor_id, doctor_name, experience)."""
+    return _load_catalog().get(selected_specialty, [])
 
 
-def get_booked_slots(doctor_id: str, day: datetime) -> List[datetime]:
-    conn = get_db_connection()
-    if not conn: return []
-    start_of_day_local = datetime.combine(day.date(), time.min, tzinfo=LOCAL_TZ)
-    end_of_day_local = datetime.combine(day.date(), time.max, tzinfo=LOCAL_TZ)
-    booked_slots = []
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT AppointmentDateTime FROM appointments
-            WHERE DoctorID = %s AND AppointmentDateTime >= %s AND AppointmentDateTime <= %s;
-        """, (int(doctor_id), start_of_day_local, end_of_day_local))
-        booked_slots = [row[0].astimezone(LOCAL_TZ) for row in cur.fetchall()]
-    conn.close()
-    return booked_slots
-
-
-def book_appointment(doctor_id: str, patient_phone: str, slot_time: datetime) -> bool:
-    conn = get_db_connection()
-    if not conn: return False
-    try:
-        with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO appointments (DoctorID, PatientPhoneNumber, AppointmentDateTime)
-                VALUES (%s, %s, %s);
-            """, (int(doctor_id), patient_phone, slot_time))
-        conn.commit()
-        return True
-    except Exception as e:
-        logger.error(f"Failed to book appointment in DB: {e}")
-        conn.rollback()
-        return False
-    finally:
-        conn.close()
+def get_doctor_by_id(doctor_id: str):
+    """O(1) doctor lookup from the catalog's by-id index; None if unknown."""
+    _load_catalog()
+    return _CATALOG_BY_ID.get(int(doctor_id))
 
 
-def find_profile_by_phone(phone_number: str) -> Union[Dict, None]:
-    conn = get_db_connection()
-    if not conn: return None
-    with conn.cursor() as cur:
-        cur.execute("SELECT PatientName, Age FROM profiles WHERE PhoneNumber = %s;", (phone_number.strip(),))
-        result = cur.fetchone()
-    conn.close()
-    return {'PatientName': result[0], 'Age': result[1]} if result else None
+# Working hours for the 15-minute slot grid.
+WORK_START_HOUR = 9
+WORK_END_HOUR = 18
+SLOT_INTERVAL_MINUTES = 15
 
+# Every slot the grid can produce, pre-rendered as a "09:15 AM" label so
+# display_slots doesn't run strftime for all 36 buttons on every render.
+_SLOT_LABELS = {
+    (h, m): time(h, m).strftime("%I:%M %p")
+    for h in range(WORK_START_HOUR, WORK_END_HOUR)
+    for m in range(0, 60, SLOT_INTERVAL_MINUTES)
+}
 
-def save_new_profile(phone_number: str, name: str, age: str) -> None:
-    conn = get_db_connection()
-    if not conn: return
-    try:
+
+# Only a couple of distinct days (today/tomorrow) are ever queried, so the
+# tz-aware boundary datetimes are memoized instead of rebuilt per call.
+@lru_cache(maxsize=8)
+def _day_bounds(d: date) -> Tuple[datetime, datetime]:
+    return (datetime.combine(d, time.min, tzinfo=LOCAL_TZ),
+            datetime.combine(d, time.max, tzinfo=LOCAL_TZ))
+
+
+@lru_cache(maxsize=8)
+def _working_hours(d: date) -> Tuple[datetime, datetime]:
+    return (datetime.combine(d, time(WORK_START_HOUR, 0), tzinfo=LOCAL_TZ),
+            datetime.combine(d, time(WORK_END_HOUR, 0), tzinfo=LOCAL_TZ))
+
+
+def get_available_slots(doctor_id: str, day: datetime, not_before: Union[datetime, None] = None) -> List[datetime]:
+    """Returns the free slots for a doctor on a given local day.
+
+    The whole computation (slot grid minus booked appointments) happens in
+    one generate_series LEFT JOIN query instead of building the grid in
+    Python and fetching booked slots in a second round-trip. Pass not_before
+    to drop slots that are already in the past (for "today").
+    """
+    start, end = _working_hours(day.date())
+    with get_conn() as conn:
+        if not conn: return []
         with conn.cursor() as cur:
-            cur.execute("""
-                INSERT INTO profiles (PhoneNumber, PatientName, Age)
-                VALUES (%s, %s, %s) ON CONFLICT (PhoneNumber) DO UPDATE
-                SET PatientName = EXCLUDED.PatientName, Age = EXCLUDED.Age;
-            """, (phone_number, name, int(age)))
-        conn.commit()
-    except Exception as e:
-        logger.error(f"Failed to save new profile to DB: {e}")
-        conn.rollback()
-    finally:
-        conn.close()
+            cur.execute("EXECUTE echo_available_slots (%s, %s, %s, %s, %s);",
+                        (start, end, SLOT_INTERVAL_MINUTES, int(doctor_id), not_before))
+            slots = [row[0].astimezone(LOCAL_TZ) for row in cur.fetchall()]
+    return slots
 
 
-def check_existing_appointment(patient_phone: str, doctor_id: str, day: datetime) -> Union[Dict, None]:
-    conn = get_db_connection()
-    if not conn: return None
-    start_of_day_local = datetime.combine(day.date(), time.min, tzinfo=LOCAL_TZ)
-    end_of_day_local = datetime.combine(day.date(), time.max, tzinfo=LOCAL_TZ)
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT AppointmentDateTime FROM appointments
-            WHERE PatientPhoneNumber = %s AND DoctorID = %s AND
-                  AppointmentDateTime >= %s AND AppointmentDateTime <= %s;
-        """, (patient_phone, int(doctor_id), start_of_day_local, end_of_day_local))
-        result = cur.fetchone()
-    conn.close()
-    return {'time': result[0].astimezone(LOCAL_TZ)} if result else None
+def book_appointment(doctor_id: str, patient_phone: str, slot_time: datetime) -> Union[Booking, None]:
+    """Books a slot, the same-day duplicate check included.
+
+    The insert relies on the ix_appt_one_per_doctor_day unique index (see
+    migrations/001): ON CONFLICT DO NOTHING makes the one-appointment-per-
+    doctor-per-day rule race-free even when two presses arrive at once.
+    Returns a Booking record with the appointment time and 'inserted'
+    telling whether the booking was made or the patient already had one
+    with this doctor that day; the doctor's details come from the session,
+    not the query. Returns None if the database is unavailable or the
+    insert failed.
+    """
+    day_start, day_end = _day_bounds(slot_time.date())
+    params = {
+        'doctor_id': int(doctor_id),
+        'phone': patient_phone,
+        'slot': slot_time,
+        'day_start': day_start,
+        'day_end': day_end,
+    }
+    with get_conn() as conn:
+        if not conn: return None
+        try:
+            with conn.cursor() as cur:
+                cur.execute(f"""
+                    WITH ins AS (
+                        INSERT INTO appointments (DoctorID, PatientPhoneNumber, AppointmentDateTime)
+                        VALUES (%(doctor_id)s, %(phone)s, %(slot)s)
+                        ON CONFLICT (DoctorID, PatientPhoneNumber,
+                                     ((AppointmentDateTime AT TIME ZONE '{LOCAL_TZ_STR}')::date))
+                        DO NOTHING
+                        RETURNING AppointmentDateTime
+                    )
+                    SELECT COALESCE((SELECT AppointmentDateTime FROM ins),
+                                    (SELECT AppointmentDateTime FROM appointments
+                                     WHERE PatientPhoneNumber = %(phone)s AND DoctorID = %(doctor_id)s
+                                       AND AppointmentDateTime >= %(day_start)s AND AppointmentDateTime <= %(day_end)s
+                                     LIMIT 1)),
+                           EXISTS (SELECT 1 FROM ins) AS inserted;
+                """, params)
+                result = cur.fetchone()
+            conn.commit()
+        except Exception as e:
+            logger.error(f"Failed to book appointment in DB: {e}")
+            conn.rollback()
+            return None
+    # Both branches of the COALESCE can be empty: if a concurrent insert of
+    # the same booking commits while ON CONFLICT waits on it, the fallback
+    # SELECT still reads the statement's earlier snapshot and can't see the
+    # winner's row. Rare double-press race; report it as a failed booking.
+    if not result or result[0] is None: return None
+    return Booking(result[0].astimezone(LOCAL_TZ), result[1])
+
+
+def find_profile_by_phone(phone_number: str) -> Union[Profile, None]:
+    phone = phone_number.strip()
+    with _PROFILE_CACHE_LOCK:
+        cached = _profile_cache.get(phone)
+        if cached and monotonic() - cached[0] < _CACHE_TTL:
+            _profile_cache.move_to_end(phone)
+            return cached[1]
+    with get_conn() as conn:
+        if not conn: return None
+        with conn.cursor() as cur:
+            cur.execute("EXECUTE echo_find_profile (%s);", (phone,))
+            result = cur.fetchone()
+    profile = Profile(*result) if result else None
+    _cache_profile(phone, profile)
+    return profile
+
+
+def save_new_profile(phone_number: str, name: str, age: str) -> None:
+    with get_conn() as conn:
+        if not conn: return
+        try:
+            with conn.cursor() as cur:
+                cur.execute("""
+                    INSERT INTO profiles (PhoneNumber, PatientName, Age)
+                    VALUES (%s, %s, %s) ON CONFLICT (PhoneNumber) DO UPDATE
+                    SET PatientName = EXCLUDED.PatientName, Age = EXCLUDED.Age;
+                """, (phone_number, name, int(age)))
+            conn.commit()
+            _cache_profile(phone_number.strip(), Profile(name, int(age)))
+        except Exception as e:
+            logger.error(f"Failed to save new profile to DB: {e}")
+            conn.rollback()
+
+
+async def db_call(fn, *args):
+    """Runs a blocking DB helper in a worker thread so the event loop stays free."""
+    return await asyncio.to_thread(fn, *args)
 
 
 # --- CONVERSATION HANDLER FUNCTIONS ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    keyboard = [
-        [
-            InlineKeyboardButton("I'm a First-time User", callback_data="new_user"),
-            InlineKeyboardButton("I'm a Regular User", callback_data="regular_user"),
-        ],
-        [InlineKeyboardButton("Stop ⛔", callback_data="cancel_flow")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     await update.message.reply_text(
         "Welcome to the Echo Appointment Bot! Please let us know if you are a new or regular user.",
         reply_markup=ReplyKeyboardRemove()
     )
-    await update.message.reply_text("Please choose an option:", reply_markup=reply_markup)
+    await update.message.reply_text("Please choose an option:", reply_markup=entry_options_markup)
     return ENTRY_POINT
 
 
@@ -229,28 +445,21 @@ async def get_age_and_ask_phone(update: Update, context: ContextTypes.DEFAULT_TY
 
 async def get_phone_and_register(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     phone_number = update.message.text
-    profile = find_profile_by_phone(phone_number)
+    profile = await db_call(find_profile_by_phone, phone_number)
 
     if profile:
         context.user_data['existing_profile'] = profile
         context.user_data['existing_phone'] = phone_number
-        patient_name = profile['PatientName']
-        keyboard = [
-            [
-                InlineKeyboardButton("Yes, continue with this account", callback_data="continue_yes"),
-                InlineKeyboardButton("No, use a different number", callback_data="continue_no"),
-            ]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
+        patient_name = profile.name
         await update.message.reply_text(
             f"This phone number is already registered to '{patient_name}'.\n\nDo you want to continue with this account?",
-            reply_markup=reply_markup
+            reply_markup=confirm_profile_markup
         )
         return CONFIRM_EXISTING_PROFILE
     else:
         name = context.user_data['name_for_reg']
         age = context.user_data['age_for_reg']
-        save_new_profile(phone_number, name, age)
+        await db_call(save_new_profile, phone_number, name, age)
         context.user_data['patient_name'] = name
         context.user_data['patient_phone'] = phone_number
         await update.message.reply_text(f"Thank you, {name}! Your profile has been created.")
@@ -265,7 +474,7 @@ async def handle_existing_profile_confirmation(update: Update, context: ContextT
     if choice == 'continue_yes':
         profile = context.user_data['existing_profile']
         phone = context.user_data['existing_phone']
-        patient_name = profile['PatientName']
+        patient_name = profile.name
         context.user_data['patient_name'] = patient_name
         context.user_data['patient_phone'] = phone
         await query.edit_message_text(f"Welcome back, {patient_name}!")
@@ -284,9 +493,9 @@ async def ask_for_phone_regular(update: Update, context: ContextTypes.DEFAULT_TY
 
 async def check_phone_and_proceed(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     phone_number = update.message.text
-    profile = find_profile_by_phone(phone_number)
+    profile = await db_call(find_profile_by_phone, phone_number)
     if profile:
-        patient_name = profile['PatientName']
+        patient_name = profile.name
         context.user_data['patient_name'] = patient_name
         context.user_data['patient_phone'] = phone_number
         await update.message.reply_text(f"Welcome back, {patient_name}!")
@@ -298,14 +507,11 @@ async def check_phone_and_proceed(update: Update, context: ContextTypes.DEFAULT_
 
 
 async def show_specialties(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    specialties = get_specialties_from_db()
-    if not specialties:
+    reply_markup = await db_call(get_specialty_markup)
+    if not reply_markup:
         reply_func = update.message.reply_text if update.message else update.callback_query.edit_message_text
         await reply_func("Sorry, specialties list is unavailable. Please try again later.")
         return ConversationHandler.END
-    keyboard = [[InlineKeyboardButton(s, callback_data=f"specialty:{s}")] for s in specialties]
-    keyboard.append([InlineKeyboardButton("Stop ⛔", callback_data="cancel_flow")])
-    reply_markup = InlineKeyboardMarkup(keyboard)
     if update.callback_query:
         await update.callback_query.edit_message_text("Please select a specialty:", reply_markup=reply_markup)
     else:
@@ -316,44 +522,40 @@ async def show_specialties(update: Update, context: ContextTypes.DEFAULT_TYPE) -
 async def choose_doctor(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    selected_specialty = query.data.split(":")[1]
+    selected_specialty = query.data.split(":", 1)[1]
     context.user_data['selected_specialty'] = selected_specialty
-    doctors = get_doctors_by_specialty(selected_specialty)
+    doctors = await db_call(get_doctors_by_specialty, selected_specialty)
     if not doctors:
         await query.edit_message_text(text=f"Sorry, no doctors found for {selected_specialty}.")
         return ConversationHandler.END
-    keyboard = [[InlineKeyboardButton(f"{d['DoctorName']} ({d['Experience']} years exp.)",
-                                      callback_data=f"doctor:{d['DoctorID']}")] for d in doctors]
+    keyboard = [[InlineKeyboardButton(f"{d.doctor_name} ({d.experience} years exp.)",
+                                      callback_data=f"doctor:{d.doctor_id}")] for d in doctors]
     keyboard.append([InlineKeyboardButton("Stop ⛔", callback_data="cancel_flow")])
     reply_markup = InlineKeyboardMarkup(keyboard)
     await query.edit_message_text(text="Please choose a doctor:", reply_markup=reply_markup)
     return CHOOSING_SLOT
 
 
-async def display_slots(query, context: ContextTypes.DEFAULT_TYPE, day_to_show: datetime):
-    """MODIFIED: The double-booking check has been REMOVED from this function."""
+async def display_slots(query, context: ContextTypes.DEFAULT_TYPE, day_to_show: datetime,
+                        now_aware: datetime):
+    """Renders the free slots for a day; the caller supplies the current time."""
     doctor_id = context.user_data['selected_doctor_id']
     selected_specialty = context.user_data['selected_specialty']
-    now_aware = datetime.now(LOCAL_TZ)
     is_today = (day_to_show.date() == now_aware.date())
 
-    all_slots = generate_time_slots(day_to_show)
-    booked_slots = get_booked_slots(doctor_id, day_to_show)
-
-    available_slots = [
-        slot for slot in all_slots
-        if slot not in booked_slots and (slot > now_aware if is_today else True)
-    ]
+    available_slots = await db_call(get_available_slots, doctor_id, day_to_show,
+                                    now_aware if is_today else None)
     keyboard = []
     day_string = "for today" if is_today else "for tomorrow"
+    # Buttons carry just the slot's index; the datetimes stay in user_data.
+    # Keeps callback_data tiny (Telegram caps it at 64 bytes) and spares
+    # make_booking an ISO timestamp parse.
+    context.user_data['slot_list'] = available_slots
     if available_slots:
         message_text = f"Please select an available time slot {day_string}:"
-        row = []
-        for slot in available_slots:
-            row.append(
-                InlineKeyboardButton(slot.strftime("%I:%M %p"), callback_data=f"book:{doctor_id}:{slot.isoformat()}"))
-            if len(row) == 2: keyboard.append(row); row = []
-        if row: keyboard.append(row)
+        buttons = [InlineKeyboardButton(_SLOT_LABELS[(slot.hour, slot.minute)], callback_data=f"book:{i}")
+                   for i, slot in enumerate(available_slots)]
+        keyboard.extend(buttons[i:i + 2] for i in range(0, len(buttons), 2))
     else:
         message_text = f"No available slots for this doctor {day_string}."
     if is_today:
@@ -371,39 +573,57 @@ async def display_slots(query, context: ContextTypes.DEFAULT_TYPE, day_to_show:
 async def choose_slot_router(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    action, doctor_id = query.data.split(":")
+    action, doctor_id = query.data.split(":", 1)
     context.user_data['selected_doctor_id'] = doctor_id
     now_aware = datetime.now(LOCAL_TZ)
     day_to_show = now_aware if action == "doctor" else now_aware + timedelta(days=1)
-    await display_slots(query, context, day_to_show)
+    await display_slots(query, context, day_to_show, now_aware)
     return CHOOSING_SLOT
 
 
 async def show_today_slots_again(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
     query = update.callback_query
     await query.answer()
-    _, doctor_id = query.data.split(":")
+    _, doctor_id = query.data.split(":", 1)
     context.user_data['selected_doctor_id'] = doctor_id
-    day_to_show = datetime.now(LOCAL_TZ)
-    await display_slots(query, context, day_to_show)
+    now_aware = datetime.now(LOCAL_TZ)
+    await display_slots(query, context, now_aware, now_aware)
     return CHOOSING_SLOT
 
 
 async def make_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    """MODIFIED: Double-booking check is now performed here, right before booking."""
+    """Acknowledges the slot press immediately; the booking itself finishes in the background."""
     query = update.callback_query
     await query.answer()
     patient_name = context.user_data.get('patient_name')
     patient_phone = context.user_data.get('patient_phone')
-    _, doctor_id, slot_iso_time = query.data.split(":", 2)
-    slot_time = datetime.fromisoformat(slot_iso_time)
-
-    # --- NEW: Double Booking Check ---
-    existing_appointment = check_existing_appointment(patient_phone, doctor_id, slot_time)
-    if existing_appointment:
-        doctor_details = get_doctor_by_id(doctor_id)
-        doctor_name = doctor_details['DoctorName']
-        booked_time = existing_appointment['time'].strftime('%I:%M %p')
+    doctor_id = context.user_data['selected_doctor_id']
+    # Served from the catalog's by-id index; no per-booking query.
+    doctor = await db_call(get_doctor_by_id, doctor_id)
+    doctor_specialty = context.user_data['selected_specialty']
+    _, slot_index = query.data.split(":", 1)
+    slot_time = context.user_data['slot_list'][int(slot_index)]
+
+    await query.edit_message_text("Booking your appointment…")
+    context.application.create_task(
+        _do_booking(query, patient_name, patient_phone, doctor_id, slot_time,
+                    doctor.doctor_name, doctor_specialty),
+        update=update,
+    )
+    return POST_BOOKING
+
+
+async def _do_booking(query, patient_name: str, patient_phone: str, doctor_id: str,
+                      slot_time: datetime, doctor_name: str, doctor_specialty: str) -> None:
+    """Runs the booking query off the handler and edits the placeholder message."""
+    result = await db_call(book_appointment, doctor_id, patient_phone, slot_time)
+    if not result:
+        await query.edit_message_text("Booking failed. Please try again.",
+                                      reply_markup=finish_session_markup)
+        return
+
+    if not result.inserted:
+        booked_time = result.time.strftime('%I:%M %p')
         day_str = slot_time.strftime('%A, %b %d')
 
         message = (
@@ -413,36 +633,19 @@ async def make_booking(update: Update, context: ContextTypes.DEFAULT_TYPE) -> in
             f"**Time:** {booked_time}\n"
             f"**Date:** {day_str}"
         )
-        keyboard = [[InlineKeyboardButton("Finish Session ✅", callback_data="end_session")]]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text=message, reply_markup=reply_markup, parse_mode='Markdown')
-        return POST_BOOKING
-    # --- End of Check ---
-
-    doctor_details = get_doctor_by_id(doctor_id)
-    doctor_name = doctor_details['DoctorName']
-    doctor_specialty = doctor_details['Specialty']
-
-    if book_appointment(doctor_id, patient_phone, slot_time):
-        confirmation_message = (
-            f"✅ **Appointment Confirmed!**\n\n"
-            f"**Patient:** {patient_name}\n"
-            f"**Doctor:** {doctor_name}\n"
-            f"**Specialty:** {doctor_specialty}\n"
-            f"**Time:** {slot_time.astimezone(LOCAL_TZ).strftime('%I:%M %p on %A, %b %d')}"
-        )
-        keyboard = [
-            [InlineKeyboardButton("Book Another Appointment", callback_data="start_over_inline")],
-            [InlineKeyboardButton("Finish Session ✅", callback_data="end_session")]
-        ]
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await query.edit_message_text(text=confirmation_message, parse_mode='Markdown')
-        await query.message.reply_text("What would you like to do next?", reply_markup=reply_markup)
-        return POST_BOOKING
-    else:
-        await query.edit_message_text("Booking failed. Please try again.")
-        context.user_data.clear()
-        return ConversationHandler.END
+        await query.edit_message_text(text=message, reply_markup=finish_session_markup,
+                                      parse_mode='Markdown')
+        return
+
+    confirmation_message = (
+        f"✅ **Appointment Confirmed!**\n\n"
+        f"**Patient:** {patient_name}\n"
+        f"**Doctor:** {doctor_name}\n"
+        f"**Specialty:** {doctor_specialty}\n"
+        f"**Time:** {result.time.strftime('%I:%M %p on %A, %b %d')}"
+    )
+    await query.edit_message_text(text=confirmation_message, parse_mode='Markdown')
+    await query.message.reply_text("What would you like to do next?", reply_markup=post_booking_markup)
 
 
 async def finish_session(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -481,26 +684,49 @@ async def cancel(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 
 def main() -> None:
-    application = Application.builder().token(TOKEN).build()
+    # uvloop is a drop-in libuv event loop that handles the socket churn of
+    # long-polling noticeably faster; the bot runs fine without it.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    # Process updates concurrently instead of one at a time. PTB gives no
+    # per-chat ordering guarantee - two rapid presses in one conversation
+    # can interleave - an accepted race: the unique index makes a doubled
+    # booking attempt a harmless duplicate. The HTTPX pool is sized for
+    # that concurrency so simultaneous replies don't exhaust it.
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(True)
+        .connection_pool_size(256)
+        .pool_timeout(30)
+        .get_updates_connection_pool_size(1)
+        .connect_timeout(10)
+        .read_timeout(10)
+        .build()
+    )
     conv_handler = ConversationHandler(
-        entry_points=[CommandHandler("start", start), MessageHandler(filters.Regex("^Start Over 🚀$"), start)],
+        entry_points=[CommandHandler("start", start), MessageHandler(START_OVER_FILTER, start)],
         states={
             ENTRY_POINT: [
                 CallbackQueryHandler(ask_for_name, pattern="^new_user$"),
                 CallbackQueryHandler(ask_for_phone_regular, pattern="^regular_user$"),
             ],
-            GETTING_NAME: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_name_and_ask_age)],
-            GETTING_AGE: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_age_and_ask_phone)],
-            GETTING_PHONE_NEW: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_phone_and_register)],
-            GETTING_PHONE_REGULAR: [MessageHandler(filters.TEXT & ~filters.COMMAND, check_phone_and_proceed)],
+            GETTING_NAME: [MessageHandler(TEXT_INPUT_FILTER, get_name_and_ask_age)],
+            GETTING_AGE: [MessageHandler(TEXT_INPUT_FILTER, get_age_and_ask_phone)],
+            GETTING_PHONE_NEW: [MessageHandler(TEXT_INPUT_FILTER, get_phone_and_register)],
+            GETTING_PHONE_REGULAR: [MessageHandler(TEXT_INPUT_FILTER, check_phone_and_proceed)],
             CONFIRM_EXISTING_PROFILE: [
-                CallbackQueryHandler(handle_existing_profile_confirmation, pattern="^continue_.*$")],
-            CHOOSING_DOCTOR: [CallbackQueryHandler(choose_doctor, pattern="^specialty:.*$")],
+                CallbackQueryHandler(handle_existing_profile_confirmation, pattern=CONTINUE_RE)],
+            CHOOSING_DOCTOR: [CallbackQueryHandler(choose_doctor, pattern=SPECIALTY_RE)],
             CHOOSING_SLOT: [
-                CallbackQueryHandler(choose_slot_router, pattern="^(doctor|next_day):.*$"),
-                CallbackQueryHandler(make_booking, pattern="^book:.*$"),
-                CallbackQueryHandler(show_today_slots_again, pattern="^show_today:.*$"),
-                CallbackQueryHandler(choose_doctor, pattern="^specialty:.*$"),
+                CallbackQueryHandler(choose_slot_router, pattern=SLOT_ROUTER_RE),
+                CallbackQueryHandler(make_booking, pattern=BOOK_RE),
+                CallbackQueryHandler(show_today_slots_again, pattern=SHOW_TODAY_RE),
+                CallbackQueryHandler(choose_doctor, pattern=SPECIALTY_RE),
             ],
             POST_BOOKING: [
                 CallbackQueryHandler(show_specialties, pattern="^start_over_inline$"),
@@ -511,7 +737,12 @@ def main() -> None:
     )
     application.add_handler(conv_handler)
     print("Echo Bot (Patient Bot) is polling...")
-    application.run_polling()
+    # Stale updates from downtime would replay half-finished conversations;
+    # only message and callback_query updates are ever handled.
+    application.run_polling(
+        drop_pending_updates=True,
+        allowed_updates=["message", "callback_query"],
+    )
 
 
 if __name__ == "__main__":
@@ -1,18 +1,25 @@
 # Nexus.py
 
+import asyncio
+import hashlib
 import logging
 import os
-from typing import Union, List, Dict
-from datetime import datetime, timedelta, time
+import threading
+import weakref
+from collections import OrderedDict
+from contextlib import contextmanager
+from time import monotonic
+from typing import Union, List, Dict, Tuple
+from datetime import date, datetime, timedelta
 import io
-import openpyxl
-import dateparser
 
 # New Imports for Time Zone Handling
 from zoneinfo import ZoneInfo
 
 # Imports for PostgreSQL Database
 import psycopg2
+from psycopg2.extras import NamedTupleCursor
+from psycopg2.pool import ThreadedConnectionPool
 from dotenv import load_dotenv
 
 from telegram import InlineKeyboardButton, InlineKeyboardMarkup, Update, ReplyKeyboardMarkup, ReplyKeyboardRemove
@@ -37,6 +44,7 @@ DATABASE_URL = os.getenv("DATABASE_URL")
 LOCAL_TZ_STR = "Asia/Kolkata"
 # ------------------------------------------------
 LOCAL_TZ = ZoneInfo(LOCAL_TZ_STR)
+_TIME_FMT = '%I:%M %p'
 
 # Enable logging
 logging.basicConfig(
@@ -49,76 +57,269 @@ AUTHENTICATING, VIEWING_OPTIONS, GETTING_DATE, POST_VIEWING_CHOICE = range(4)
 
 # --- KEYBOARDS ---
 start_over_keyboard = ReplyKeyboardMarkup([["Start Over 🚀"]], resize_keyboard=True, one_time_keyboard=True)
+viewing_options_markup = InlineKeyboardMarkup([
+    [InlineKeyboardButton("Today's Appointments", callback_data="view_today")],
+    [InlineKeyboardButton("Tomorrow's Appointments", callback_data="view_tomorrow")],
+    [InlineKeyboardButton("View by Specific Date", callback_data="view_specific_date")],
+    [InlineKeyboardButton("End Session", callback_data="end_session")],
+])
+post_viewing_markup = InlineKeyboardMarkup([
+    [InlineKeyboardButton("See Other Records?", callback_data="view_again")],
+    [InlineKeyboardButton("End Session", callback_data="end_session")]
+])
+
+# --- HANDLER FILTERS ---
+# Composed once; every MessageHandler line reuses the same filter objects.
+TEXT_INPUT_FILTER = filters.TEXT & ~filters.COMMAND
+START_OVER_FILTER = filters.Regex("^Start Over 🚀$")
 
 
 # --- DATABASE HELPER FUNCTIONS ---
 
-def get_db_connection():
-    """Establishes and returns a database connection."""
-    try:
-        return psycopg2.connect(DATABASE_URL)
-    except psycopg2.OperationalError as e:
-        logger.error(f"CRITICAL: Could not connect to the database: {e}")
-        return None
-
-
-def find_doctor_by_id(doctor_id: str) -> Union[Dict, None]:
-    """Finds a doctor's details by their ID from the database."""
-    conn = get_db_connection()
-    if not conn: return None
+# Opening a fresh connection per query costs a full TCP+auth handshake;
+# a small pool keeps connections alive across handler calls instead.
+_POOL: Union[ThreadedConnectionPool, None] = None
+# Helpers run on db_call worker threads, so first use can race: without the
+# lock two threads could each build a pool and leak the loser's connections.
+_POOL_LOCK = threading.Lock()
+
+
+def _get_pool() -> Union[ThreadedConnectionPool, None]:
+    global _POOL
+    if _POOL is None:
+        with _POOL_LOCK:
+            if _POOL is None:
+                try:
+                    # Pin the session time zone at connect time so TIMESTAMPTZ
+                    # columns come back already in local time and rows don't
+                    # each need an astimezone() conversion in Python.
+                    # minconn == maxconn: putconn closes any connection
+                    # beyond minconn, so a smaller floor would shed burst
+                    # connections (and their prepared plans) after each
+                    # spike, re-paying the handshake next time.
+                    _POOL = ThreadedConnectionPool(
+                        10, 10, DATABASE_URL, options=f"-c timezone={LOCAL_TZ_STR}"
+                    )
+                except psycopg2.OperationalError as e:
+                    logger.error(f"CRITICAL: Could not connect to the database: {e}")
+    return _POOL
+
+
+# Server-side prepared plans for the two queries run on every interaction.
+# Prepared once per pooled connection (session state survives
+# putconn/getconn), so Postgres skips re-parsing and re-planning the SQL
+# text on every execution.
+_PREPARE_STATEMENTS = f"""
+    PREPARE nexus_find_doctor (int) AS
+        SELECT DoctorName FROM doctors WHERE DoctorID = $1;
+    PREPARE nexus_day_appointments (int, date) AS
+        SELECT a.AppointmentDateTime AS appt_time, p.PatientName AS patient_name,
+               d.DoctorName AS doctor_name
+        FROM appointments a
+        JOIN profiles p ON a.PatientPhoneNumber = p.PhoneNumber
+        JOIN doctors d ON a.DoctorID = d.DoctorID
+        WHERE a.DoctorID = $1
+          AND (a.AppointmentDateTime AT TIME ZONE '{LOCAL_TZ_STR}')::date = $2
+        ORDER BY a.AppointmentDateTime;
+"""
+
+
+# psycopg2's C connection type has no instance __dict__, so prepared
+# connections can't be flagged with an attribute; track them in a weak
+# registry instead. Entries disappear when the pool closes a connection,
+# and each connection is only ever held by one thread at a time.
+_PREPARED_CONNS = weakref.WeakSet()
+
+
+def _ensure_prepared(conn) -> None:
+    if conn in _PREPARED_CONNS:
+        return
     with conn.cursor() as cur:
-        cur.execute("SELECT DoctorName FROM doctors WHERE DoctorID = %s;", (int(doctor_id),))
-        result = cur.fetchone()
-    conn.close()
-    return {'DoctorName': result[0]} if result else None
-
+        cur.execute(_PREPARE_STATEMENTS)
+    _PREPARED_CONNS.add(conn)
 
-def get_appointments_for_doctor(doctor_id: str, day: datetime.date) -> List[Dict]:
-    """Fetches appointment details for a doctor on a given LOCAL day."""
-    conn = get_db_connection()
-    if not conn: return []
 
-    start_of_day_local = datetime.combine(day, time.min, tzinfo=LOCAL_TZ)
-    end_of_day_local = datetime.combine(day, time.max, tzinfo=LOCAL_TZ)
+@contextmanager
+def get_conn():
+    """Checks a connection out of the pool and always returns it when done.
 
-    appointments_list = []
-    with conn.cursor() as cur:
-        cur.execute("""
-            SELECT a.AppointmentDateTime, p.PatientName
-            FROM appointments a
-            JOIN profiles p ON a.PatientPhoneNumber = p.PhoneNumber
-            WHERE a.DoctorID = %s AND a.AppointmentDateTime >= %s AND a.AppointmentDateTime <= %s
-            ORDER BY a.AppointmentDateTime;
-        """, (int(doctor_id), start_of_day_local, end_of_day_local))
-        appointments_list = [{'time': row[0], 'patient_name': row[1]} for row in cur.fetchall()]
-    conn.close()
-    return appointments_list
-
-
-def create_appointments_excel(appointments: List[Dict], doctor_name: str, day: datetime.date) -> io.BytesIO:
-    """Creates an XLSX file with times converted to the local time zone."""
-    workbook = openpyxl.Workbook()
-    sheet = workbook.active
-    sheet.title = day.strftime('%Y-%m-%d')
-    sheet['A1'] = f"Appointments for Dr. {doctor_name}"
-    sheet['A2'] = f"Date: {day.strftime('%A, %B %d, %Y')}"
-    sheet.merge_cells('A1:B1')
-    sheet['A4'] = "Appointment Time"
-    sheet['B4'] = "Patient Name"
-    for index, record in enumerate(appointments, start=5):
-        local_time = record['time'].astimezone(LOCAL_TZ)
-        sheet[f'A{index}'] = local_time.strftime('%I:%M %p')
-        sheet[f'B{index}'] = record['patient_name']
-    for cell in ['A1', 'A4', 'B4']:
-        sheet[cell].font = openpyxl.styles.Font(bold=True)
+    Yields None if the pool itself is unavailable. Connections that raised
+    are discarded (close=True) instead of being put back in the pool.
+    """
+    pool = _get_pool()
+    if not pool:
+        yield None
+        return
+    try:
+        conn = pool.getconn()
+    except psycopg2.pool.PoolError as e:
+        # Every connection is checked out; degrade like an unavailable
+        # pool (helpers return None/[]) instead of crashing the handler.
+        logger.error(f"Connection pool exhausted: {e}")
+        yield None
+        return
+    broken = False
+    try:
+        _ensure_prepared(conn)
+        yield conn
+    except Exception:
+        broken = True
+        raise
+    finally:
+        pool.putconn(conn, close=broken)
+
+
+# Doctors re-authenticate every session (and retry after typos), but their
+# names don't change; remember successful lookups for a few minutes. Misses
+# are cached too - repeated typos shouldn't each cost a query - but only
+# briefly, so a freshly added doctor isn't locked out for long.
+_CACHE_TTL = 300  # seconds
+_MISS_TTL = 30  # seconds
+# Bounded as an LRU - misses are keyed by whatever unauthenticated users
+# type, so an unbounded dict would grow for the life of the process. The
+# lock keeps the multi-step bump/evict sequences safe across the db_call
+# worker threads that run this helper.
+_DOCTOR_CACHE_MAX = 256
+_doctor_names: "OrderedDict[str, Tuple[float, Union[str, None]]]" = OrderedDict()
+_DOCTOR_CACHE_LOCK = threading.Lock()
+
+
+def get_doctor_name(doctor_id: str) -> Union[str, None]:
+    """Returns a doctor's name (None if unknown), served from cache when
+    fresh. The name is the only doctor field the bot uses, so the cache
+    holds plain strings rather than row wrappers."""
+    with _DOCTOR_CACHE_LOCK:
+        cached = _doctor_names.get(doctor_id)
+        if cached:
+            ts, name = cached
+            if monotonic() - ts < (_CACHE_TTL if name else _MISS_TTL):
+                _doctor_names.move_to_end(doctor_id)
+                return name
+    with get_conn() as conn:
+        if not conn: return None
+        with conn.cursor() as cur:
+            cur.execute("EXECUTE nexus_find_doctor (%s);", (int(doctor_id),))
+            result = cur.fetchone()
+    name = result[0] if result else None
+    with _DOCTOR_CACHE_LOCK:
+        _doctor_names[doctor_id] = (monotonic(), name)
+        _doctor_names.move_to_end(doctor_id)
+        if len(_doctor_names) > _DOCTOR_CACHE_MAX:
+            _doctor_names.popitem(last=False)
+    return name
+
+
+def get_appointments_for_doctor(doctor_id: str, day: datetime.date) -> Tuple[Union[str, None], List]:
+    """Fetches a doctor's name and appointment rows for a given LOCAL day.
+
+    The doctors JOIN rides along on the same round-trip, so standalone
+    callers don't need a separate find_doctor_by_id query. The name is None
+    when the doctor has no appointments that day.
+
+    Rows come back as namedtuples (appt_time, patient_name, doctor_name)
+    straight from the cursor - no per-row dict rebuild on this hot path.
+
+    The day filter compares the timestamp cast to a local date so the
+    functional index from migrations/003 can satisfy it directly; the time
+    zone is spliced in as a literal because the index expression has to
+    match textually.
+    """
+    with get_conn() as conn:
+        if not conn: return None, []
+        with conn.cursor(cursor_factory=NamedTupleCursor) as cur:
+            cur.execute("EXECUTE nexus_day_appointments (%s, %s);",
+                        (int(doctor_id), day))
+            rows = cur.fetchall()
+    doctor_name = rows[0].doctor_name if rows else None
+    return doctor_name, rows
+
+
+def create_appointments_excel(rows: List[Tuple[str, str]], doctor_name: str, day: datetime.date) -> io.BytesIO:
+    """Creates an XLSX file from pre-formatted (time string, patient) pairs.
+
+    The caller formats each row once and shares the result between the chat
+    message and this export, so no strftime runs here.
+
+    Uses openpyxl's write-only mode, which streams rows out as they are
+    appended instead of keeping a full cell tree in memory - the save cost
+    stays flat however many appointments a doctor has.
+
+    openpyxl is imported here rather than at module top: it pulls in XML
+    and style machinery most sessions never need, and Python caches the
+    module after the first export.
+    """
+    import openpyxl
+    from openpyxl.cell import WriteOnlyCell
+
+    workbook = openpyxl.Workbook(write_only=True)
+    # isoformat() gives the same YYYY-MM-DD as the old strftime without a
+    # format-string parse.
+    sheet = workbook.create_sheet(title=day.isoformat())
+    # Column widths must be set before the first append in write-only mode.
     sheet.column_dimensions['A'].width = 20
     sheet.column_dimensions['B'].width = 30
+
+    bold = openpyxl.styles.Font(bold=True)
+
+    def bold_cell(value: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(sheet, value=value)
+        cell.font = bold
+        return cell
+
+    sheet.append([bold_cell(f"Appointments for Dr. {doctor_name}")])
+    sheet.append([f"Date: {day.strftime('%A, %B %d, %Y')}"])
+    sheet.append([])
+    sheet.append([bold_cell("Appointment Time"), bold_cell("Patient Name")])
+    for time_str, patient_name in rows:
+        sheet.append([time_str, patient_name])
     file_stream = io.BytesIO()
     workbook.save(file_stream)
     file_stream.seek(0)
     return file_stream
 
 
+# Doctors often re-view the same day within a session; serializing an
+# identical workbook each time is wasted CPU. The blob cache is keyed by the
+# row data itself, so a new or changed appointment naturally misses.
+_XLSX_CACHE: "OrderedDict[tuple, bytes]" = OrderedDict()
+_XLSX_MAX = 128
+# The lookup/bump and insert/evict sequences are multi-step; db_call worker
+# threads need the lock so a concurrent eviction can't land between them.
+_XLSX_LOCK = threading.Lock()
+
+
+def get_appointments_excel(rows: List[Tuple[str, str]], doctor_name: str, day: datetime.date) -> io.BytesIO:
+    """Returns the XLSX for a doctor's day, reusing cached bytes when the
+    rows haven't changed since the last export."""
+    key = (doctor_name, day, tuple(rows))
+    with _XLSX_LOCK:
+        blob = _XLSX_CACHE.get(key)
+        if blob is not None:
+            _XLSX_CACHE.move_to_end(key)
+    if blob is None:
+        # Built outside the lock; two threads racing on the same key just
+        # serialize the same bytes twice, which is harmless.
+        blob = create_appointments_excel(rows, doctor_name, day).getvalue()
+        with _XLSX_LOCK:
+            _XLSX_CACHE[key] = blob
+            if len(_XLSX_CACHE) > _XLSX_MAX:
+                _XLSX_CACHE.popitem(last=False)
+    return io.BytesIO(blob)
+
+
+# Telegram hands back a reusable file_id after every upload; sending that ID
+# instead of the bytes skips the re-upload entirely when a doctor pulls the
+# same sheet again. Keyed by content hash so a changed day uploads fresh.
+_FILE_IDS: "OrderedDict[bytes, str]" = OrderedDict()
+_FILE_IDS_MAX = 128
+
+
+async def db_call(fn, *args):
+    """Runs a blocking helper (DB query or XLSX build) in a worker thread
+    so the polling loop keeps servicing other updates meanwhile."""
+    return await asyncio.to_thread(fn, *args)
+
+
 # --- CONVERSATION HANDLER FUNCTIONS ---
 
 async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
@@ -130,10 +331,12 @@ async def start(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
 
 
 async def authenticate_doctor(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    doctor_id = update.message.text
-    doctor_profile = find_doctor_by_id(doctor_id)
-    if doctor_profile:
-        doctor_name = doctor_profile.get('DoctorName', 'Doctor')
+    # Normalize once at the edge: every downstream consumer (cache key,
+    # int() casts for the prepared queries) sees the same clean token, and
+    # non-numeric input short-circuits instead of raising in int().
+    doctor_id = update.message.text.strip()
+    doctor_name = await db_call(get_doctor_name, doctor_id) if doctor_id.isdigit() else None
+    if doctor_name:
         context.user_data['doctor_id'] = doctor_id
         context.user_data['doctor_name'] = doctor_name
         await update.message.reply_text(f"Hello Dr. {doctor_name}, hope you are doing well!")
@@ -144,18 +347,11 @@ async def authenticate_doctor(update: Update, context: ContextTypes.DEFAULT_TYPE
 
 
 async def show_viewing_options(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    keyboard = [
-        [InlineKeyboardButton("Today's Appointments", callback_data="view_today")],
-        [InlineKeyboardButton("Tomorrow's Appointments", callback_data="view_tomorrow")],
-        [InlineKeyboardButton("View by Specific Date", callback_data="view_specific_date")],
-        [InlineKeyboardButton("End Session", callback_data="end_session")],
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
     if update.callback_query:
         await update.callback_query.answer()
-        await update.callback_query.edit_message_text("Please choose an option:", reply_markup=reply_markup)
+        await update.callback_query.edit_message_text("Please choose an option:", reply_markup=viewing_options_markup)
     else:
-        await update.message.reply_text("Please choose an option:", reply_markup=reply_markup)
+        await update.message.reply_text("Please choose an option:", reply_markup=viewing_options_markup)
     return VIEWING_OPTIONS
 
 
@@ -177,12 +373,46 @@ async def ask_for_specific_date(update: Update, context: ContextTypes.DEFAULT_TY
     return GETTING_DATE
 
 
+# dateparser.parse() rebuilds its parser and probes every configured locale
+# on each call; a single English-only DateDataParser reuses the detected
+# language across calls. Built lazily so dateparser's locale tables only
+# load if free-form input ever shows up.
+_DATE_PARSER = None
+
+
+def _free_form_parse(user_input: str) -> Union[datetime, None]:
+    global _DATE_PARSER
+    if _DATE_PARSER is None:
+        from dateparser.date import DateDataParser
+        _DATE_PARSER = DateDataParser(languages=['en'])
+    return _DATE_PARSER.get_date_data(user_input).date_obj
+
+
+def _parse_date_input(user_input: str) -> Union[date, None]:
+    """Resolves a typed date, handling the common tokens without dateparser.
+
+    Almost all real inputs are 'today', 'tomorrow', or an ISO date;
+    dateparser's locale-table format iteration only runs for free-form
+    text like 'next Tuesday'.
+    """
+    token = user_input.strip().lower()
+    if token == 'today':
+        return datetime.now(LOCAL_TZ).date()
+    if token == 'tomorrow':
+        return datetime.now(LOCAL_TZ).date() + timedelta(days=1)
+    try:
+        return date.fromisoformat(token)
+    except ValueError:
+        pass
+    date_obj = _free_form_parse(user_input)
+    return date_obj.date() if date_obj else None
+
+
 async def get_specific_date(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int:
-    user_input = update.message.text
-    date_obj = dateparser.parse(user_input)
+    date_to_view = _parse_date_input(update.message.text)
 
-    if date_obj:
-        return await display_records(update, context, date_obj.date())
+    if date_to_view:
+        return await display_records(update, context, date_to_view)
     else:
         await update.message.reply_text(
             "Sorry, I couldn't understand that date. Please try again (e.g., 'tomorrow', 'Oct 5', '2025-10-05').")
@@ -191,41 +421,58 @@ async def get_specific_date(update: Update, context: ContextTypes.DEFAULT_TYPE)
 
 async def display_records(update: Update, context: ContextTypes.DEFAULT_TYPE, date_to_view: datetime.date) -> int:
     doctor_id = context.user_data['doctor_id']
-    doctor_name = context.user_data['doctor_name']
-    appointments = get_appointments_for_doctor(doctor_id, date_to_view)
+    doctor_db_name, appointments = await db_call(get_appointments_for_doctor, doctor_id, date_to_view)
+    doctor_name = doctor_db_name or context.user_data['doctor_name']
     total_appointments = len(appointments)
 
     date_str = date_to_view.strftime('%A, %B %d, %Y')
 
-    if appointments:
-        appointment_details = "\n".join(
-            f"• {record['time'].astimezone(LOCAL_TZ).strftime('%I:%M %p')} - {record['patient_name']}"
-            for record in appointments
-        )
-        message_text = f"Appointments for {date_str}:\n\n{appointment_details}\n\n*Total Appointments: {total_appointments}*"
-    else:
+    # Format each appointment once; the chat message and the XLSX export
+    # share these pairs instead of running strftime twice per row.
+    rows = [(record.appt_time.strftime(_TIME_FMT), record.patient_name)
+            for record in appointments]
+
+    if not rows:
+        # Nothing to list: fold the follow-up keyboard into the one reply
+        # (and skip Markdown parsing) instead of two API round-trips.
         message_text = f"No appointments found for {date_str}."
+        if update.callback_query:
+            await update.callback_query.edit_message_text(message_text, reply_markup=post_viewing_markup)
+        else:
+            await update.message.reply_text(message_text, reply_markup=post_viewing_markup)
+        return POST_VIEWING_CHOICE
+
+    appointment_details = "\n".join(f"• {t} - {p}" for t, p in rows)
+    message_text = f"Appointments for {date_str}:\n\n{appointment_details}\n\n*Total Appointments: {total_appointments}*"
 
     if update.callback_query:
         await update.callback_query.edit_message_text(message_text, parse_mode='Markdown')
     else:
         await update.message.reply_text(message_text, parse_mode='Markdown')
 
-    if appointments:
-        excel_file = create_appointments_excel(appointments, doctor_name, date_to_view)
-        file_name = f"Appointments_{doctor_name.replace(' ', '_')}_{date_to_view}.xlsx"
+    excel_file = await db_call(get_appointments_excel, rows, doctor_name, date_to_view)
+    file_name = f"Appointments_{doctor_name.replace(' ', '_')}_{date_to_view}.xlsx"
+    digest = hashlib.sha256(excel_file.getvalue()).digest()
+    file_id = _FILE_IDS.get(digest)
+    if file_id:
+        _FILE_IDS.move_to_end(digest)
         await context.bot.send_document(
+            chat_id=update.effective_chat.id,
+            document=file_id,
+            filename=file_name
+        )
+    else:
+        sent = await context.bot.send_document(
             chat_id=update.effective_chat.id,
             document=excel_file,
             filename=file_name
         )
+        if sent.document:
+            _FILE_IDS[digest] = sent.document.file_id
+            if len(_FILE_IDS) > _FILE_IDS_MAX:
+                _FILE_IDS.popitem(last=False)
 
-    keyboard = [
-        [InlineKeyboardButton("See Other Records?", callback_data="view_again")],
-        [InlineKeyboardButton("End Session", callback_data="end_session")]
-    ]
-    reply_markup = InlineKeyboardMarkup(keyboard)
-    await update.effective_message.reply_text("What would you like to do next?", reply_markup=reply_markup)
+    await update.effective_message.reply_text("What would you like to do next?", reply_markup=post_viewing_markup)
 
     return POST_VIEWING_CHOICE
 
@@ -247,17 +494,36 @@ async def end_session(update: Update, context: ContextTypes.DEFAULT_TYPE) -> int
 
 
 def main() -> None:
-    application = Application.builder().token(TOKEN).build()
+    # uvloop is a drop-in libuv event loop that handles the socket churn of
+    # long-polling noticeably faster; the bot runs fine without it.
+    try:
+        import uvloop
+        uvloop.install()
+    except ImportError:
+        pass
+
+    # Process updates concurrently. PTB gives no per-chat ordering
+    # guarantee - two rapid presses in one conversation can interleave -
+    # an accepted race for a bot that only reads and re-renders.
+    application = (
+        Application.builder()
+        .token(TOKEN)
+        .concurrent_updates(True)
+        .connection_pool_size(32)
+        .pool_timeout(30)
+        .get_updates_connection_pool_size(1)
+        .build()
+    )
     conv_handler = ConversationHandler(
-        entry_points=[CommandHandler("start", start), MessageHandler(filters.Regex("^Start Over 🚀$"), start)],
+        entry_points=[CommandHandler("start", start), MessageHandler(START_OVER_FILTER, start)],
         states={
-            AUTHENTICATING: [MessageHandler(filters.TEXT & ~filters.COMMAND, authenticate_doctor)],
+            AUTHENTICATING: [MessageHandler(TEXT_INPUT_FILTER, authenticate_doctor)],
             VIEWING_OPTIONS: [
                 CallbackQueryHandler(view_records_router, pattern="^view_(today|tomorrow)$"),
                 CallbackQueryHandler(ask_for_specific_date, pattern="^view_specific_date$"),
                 CallbackQueryHandler(end_session, pattern="^end_session$")
             ],
-            GETTING_DATE: [MessageHandler(filters.TEXT & ~filters.COMMAND, get_specific_date)],
+            GETTING_DATE: [MessageHandler(TEXT_INPUT_FILTER, get_specific_date)],
             POST_VIEWING_CHOICE: [
                 CallbackQueryHandler(show_viewing_options, pattern="^view_again$"),
                 CallbackQueryHandler(end_session, pattern="^end_session$"),
@@ -267,7 +533,12 @@ def main() -> None:
     )
     application.add_handler(conv_handler)
     print("Nexus Bot (Doctor Bot) is polling...")
-    application.run_polling()
+    # Stale updates from downtime would replay half-finished conversations;
+    # only message and callback_query updates are ever handled.
+    application.run_polling(
+        drop_pending_updates=True,
+        allowed_updates=["message", "callback_query"],
+    )
 
 
 if __name__ == "__main__":
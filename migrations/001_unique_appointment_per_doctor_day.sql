@@ -0,0 +1,6 @@
+-- Enforce at most one appointment per patient per doctor per local day.
+-- The index expression must match the ON CONFLICT target used by
+-- book_appointment in Echo.py, including the time zone.
+CREATE UNIQUE INDEX IF NOT EXISTS ix_appt_one_per_doctor_day
+    ON appointments (DoctorID, PatientPhoneNumber,
+                     ((AppointmentDateTime AT TIME ZONE 'Asia/Kolkata')::date));
@@ -0,0 +1,9 @@
+-- Support the hot lookups with index-range scans instead of seq scans:
+--   * slot availability / per-day appointment listings filter by
+--     DoctorID plus an AppointmentDateTime range,
+--   * the duplicate-booking fallback filters by PatientPhoneNumber.
+-- CONCURRENTLY so the indexes can be added without locking out the bots.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appt_doctor_time
+    ON appointments (DoctorID, AppointmentDateTime);
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appt_phone
+    ON appointments (PatientPhoneNumber);
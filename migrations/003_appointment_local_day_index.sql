@@ -0,0 +1,8 @@
+-- Let Nexus's per-day appointment listing run as a plain index scan:
+-- get_appointments_for_doctor filters on DoctorID plus the timestamp cast
+-- to a local-time date, so the index expression must match that query
+-- (and the time zone literal) exactly.
+-- CONCURRENTLY so the index can be added without locking out the bots.
+CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_appt_doctor_local_day
+    ON appointments (DoctorID,
+                     ((AppointmentDateTime AT TIME ZONE 'Asia/Kolkata')::date));